@@ -2,11 +2,13 @@ import base64
 import json
 import re
 import concurrent.futures
+import threading
 import time
 
+from collections import deque
 from datetime import datetime
-from typing import List, Tuple
-from openai import OpenAI
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from openai import APIConnectionError, APIStatusError, APITimeoutError, OpenAI
 from PIL import Image
 
 from config.prompts import BANK_PROMPTS
@@ -14,6 +16,51 @@ from models.transaction import Transaction
 from services.pdf_service import image_to_bytes
 
 
+# 요청 데드라인 / 헤징 설정
+DEFAULT_TIMEOUT = 180.0      # 요청 타임아웃 상한 (표본 부족 시·타임아웃 후 재시도에 사용)
+MIN_TIMEOUT = 30.0           # 관측 기반 타임아웃 하한(초)
+TIMEOUT_MULTIPLIER = 3.0     # p95 × 배수 = 요청 데드라인
+MIN_LATENCY_SAMPLES = 5      # 이 개수 이상 관측돼야 백분위 사용
+HEDGE_BUDGET_RATIO = 0.1     # 실행당 헤지 요청 상한 (전체 페이지 대비 비율, 최소 1건)
+HEDGE_POLL_INTERVAL = 0.5    # 지연 페이지 점검 주기(초)
+
+
+class LatencyTracker:
+    """최근 GPT 호출 지연시간을 기록하고 백분위를 계산 (스레드 안전)"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """p 백분위 지연시간 (표본 부족 시 None)"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        idx = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[idx]
+
+    def request_timeout(self) -> float:
+        """요청 데드라인: p95 × 배수를 [MIN_TIMEOUT, DEFAULT_TIMEOUT] 범위로 제한"""
+        p95 = self.percentile(95)
+        if p95 is None:
+            return DEFAULT_TIMEOUT
+        return min(DEFAULT_TIMEOUT, max(MIN_TIMEOUT, p95 * TIMEOUT_MULTIPLIER))
+
+    def hedge_after(self) -> Optional[float]:
+        """이 시간(초)을 넘겨 미완료인 페이지는 중복 요청 대상 (표본 부족 시 None)"""
+        return self.percentile(95)
+
+
+# 앱 실행 동안 유지되는 전역 지연 통계 (이전 실행의 관측값도 활용)
+latency_tracker = LatencyTracker()
+
+
 def image_to_base64(image: Image.Image) -> str:
     """PIL 이미지를 base64 문자열로 변환"""
     img_bytes = image_to_bytes(image)
@@ -38,20 +85,55 @@ def extract_json_from_response(text: str) -> list:
     return []
 
 
+class RequestCancelled(Exception):
+    """페이지가 이미 다른 요청으로 처리되었거나 실행이 중단되어 멈춘 요청"""
+
+
+class DeadlineExceeded(Exception):
+    """스트리밍 응답이 요청 데드라인 안에 끝나지 않음"""
+
+
+def _is_retryable(e: Exception) -> bool:
+    """일시적 오류 여부 (연결 오류, 408/409/429, 5xx)"""
+    if isinstance(e, APIConnectionError):
+        return True
+    if isinstance(e, APIStatusError):
+        return e.status_code in (408, 409, 429) or e.status_code >= 500
+    return "429" in str(e)
+
+
 def call_gpt_single_page(
     client: OpenAI,
     image: Image.Image,
     bank_name: str,
     page_num: int,
+    on_attempt: Optional[Callable[[Optional[float]], None]] = None,
+    cancel: Optional[threading.Event] = None,
 ) -> Tuple[int, list]:
-    """단일 페이지 GPT Vision 호출 (429 자동 재시도 포함)"""
+    """단일 페이지 GPT Vision 호출 (일시적 오류 재시도, 관측 지연 기반 타임아웃 포함)
+
+    응답을 스트리밍으로 받아 청크마다 데드라인과 cancel을 확인한다.
+    첫 요청은 관측 지연 기반 데드라인을 쓰고, 타임아웃되면 DEFAULT_TIMEOUT으로 재시도.
+    on_attempt에는 요청 시작 시각(monotonic)이, 재시도 대기 중에는 None이 전달된다.
+    cancel이 설정되면 다음 청크·재시도 시점에 RequestCancelled로 중단.
+    """
     prompt = BANK_PROMPTS.get(bank_name, BANK_PROMPTS["기타"])
     b64 = image_to_base64(image)
+    # SDK 자체 재시도를 끄고 아래 루프에서만 재시도 (데드라인·cancel이 적용되도록)
+    client = client.with_options(max_retries=0)
+    cancel = cancel or threading.Event()
+    timeout = latency_tracker.request_timeout()
 
     max_retries = 5
     for attempt in range(max_retries):
+        if cancel.is_set():
+            raise RequestCancelled(page_num)
+        started = time.monotonic()
+        if on_attempt:
+            on_attempt(started)
         try:
-            response = client.chat.completions.create(
+            parts = []
+            with client.chat.completions.create(
                 model="gpt-4o",
                 messages=[
                     {
@@ -73,45 +155,170 @@ def call_gpt_single_page(
                 ],
                 max_tokens=16000,
                 temperature=0,
-            )
-            raw = response.choices[0].message.content
-            transactions = extract_json_from_response(raw)
+                timeout=timeout,
+                stream=True,
+            ) as stream:
+                for chunk in stream:
+                    if cancel.is_set():
+                        raise RequestCancelled(page_num)
+                    if time.monotonic() - started > timeout:
+                        raise DeadlineExceeded(page_num)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+            if cancel.is_set():
+                raise RequestCancelled(page_num)
+            latency_tracker.record(time.monotonic() - started)
+            transactions = extract_json_from_response("".join(parts))
             print(f"[페이지 {page_num}] 추출 {len(transactions)}건")
             return page_num, transactions
 
+        except (APITimeoutError, DeadlineExceeded):
+            # 타임아웃도 표본에 포함 (느린 호출이 빠지면 p95가 낮게 치우침)
+            latency_tracker.record(timeout)
+            if cancel.is_set():
+                raise RequestCancelled(page_num)
+            if timeout < DEFAULT_TIMEOUT and attempt < max_retries - 1:
+                print(f"[페이지 {page_num}] {timeout:.0f}초 타임아웃 → {DEFAULT_TIMEOUT:.0f}초로 재시도")
+                timeout = DEFAULT_TIMEOUT
+                continue
+            raise
+
         except Exception as e:
-            if "429" in str(e) and attempt < max_retries - 1:
+            if cancel.is_set():
+                raise RequestCancelled(page_num)
+            if _is_retryable(e) and attempt < max_retries - 1:
+                if on_attempt:
+                    on_attempt(None)  # 대기 중에는 헤지하지 않음
                 wait = 2 ** attempt  # 1초 → 2초 → 4초 → 8초
-                time.sleep(wait)
+                if cancel.wait(wait):
+                    raise RequestCancelled(page_num)
                 continue
             raise
 
 
+def run_hedged(
+    call_page: Callable[[int, Callable[[Optional[float]], None], threading.Event], list],
+    num_pages: int,
+    tracker: LatencyTracker,
+    hedge_budget: int,
+    progress_callback=None,
+    max_workers: int = 3,
+    poll_interval: float = HEDGE_POLL_INTERVAL,
+) -> list:
+    """페이지별 call_page(idx, on_attempt, cancel)를 병렬 실행하고 지연 페이지는 헤지
+
+    진행 중인 요청이 tracker.hedge_after()를 넘긴 페이지는 별도 스레드로
+    한 번만 중복 요청하고, 먼저 성공한 결과를 채택한다 (최대 hedge_budget건).
+    페이지가 완료되면 그 페이지의 cancel을 설정해 진 요청이 워커를 비우게 하고,
+    종료(예외 포함) 시에는 남은 모든 요청에 cancel을 설정한다.
+    모든 요청이 실패한 페이지는 예외를 그대로 올린다.
+    """
+    results = [None] * num_pages
+    hedges_used = 0
+    hedged: Set[int] = set()
+
+    # 페이지별 1차 요청의 현재 시도 시작 시각 (429 대기 중이면 None)
+    inflight: Dict[int, Optional[float]] = {}
+    attempts: Dict[int, List[concurrent.futures.Future]] = {}
+    owner: Dict[concurrent.futures.Future, int] = {}
+    cancels = [threading.Event() for _ in range(num_pages)]
+
+    def primary(idx):
+        def on_attempt(started):
+            inflight[idx] = started
+        return call_page(idx, on_attempt, cancels[idx])
+
+    def hedge(idx):
+        return call_page(idx, lambda started: None, cancels[idx])
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    hedge_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    try:
+        for idx in range(num_pages):
+            future = executor.submit(primary, idx)
+            attempts[idx] = [future]
+            owner[future] = idx
+
+        completed = 0
+        while attempts:
+            running = [f for futures in attempts.values() for f in futures]
+            done, _ = concurrent.futures.wait(
+                running,
+                timeout=poll_interval,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+
+            for future in done:
+                idx = owner[future]
+                if idx not in attempts:
+                    continue  # 다른 요청이 이미 완료한 페이지
+                try:
+                    result = future.result()
+                except Exception:
+                    attempts[idx].remove(future)
+                    if attempts[idx]:
+                        continue  # 남은 요청 결과를 기다림
+                    raise
+                results[idx] = result
+                cancels[idx].set()  # 진 요청은 다음 확인 시점에 중단
+                for loser in attempts.pop(idx):
+                    loser.cancel()
+                completed += 1
+                if progress_callback:
+                    progress_callback(completed, num_pages)
+
+            # 지연 페이지 헤지
+            threshold = tracker.hedge_after()
+            if threshold is None or hedges_used >= hedge_budget:
+                continue
+            now = time.monotonic()
+            for idx in list(attempts):
+                if hedges_used >= hedge_budget:
+                    break
+                started = inflight.get(idx)
+                if idx in hedged or started is None or now - started < threshold:
+                    continue
+                print(f"[페이지 {idx}] {now - started:.1f}초 지연 → 중복 요청")
+                future = hedge_executor.submit(hedge, idx)
+                attempts[idx].append(future)
+                owner[future] = idx
+                hedged.add(idx)
+                hedges_used += 1
+    finally:
+        # 남은 요청에 중단 신호만 보내고 기다리지는 않음
+        # (실행 중인 요청은 다음 청크·재시도 시점에 RequestCancelled로 종료)
+        for cancel in cancels:
+            cancel.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        hedge_executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
+
 def process_pdf_with_gpt(
     client: OpenAI,
     images: List[Image.Image],
     bank_name: str,
     progress_callback=None,
 ) -> List[Transaction]:
-    """전체 PDF 페이지를 병렬로 GPT 처리 후 Transaction 리스트 반환"""
-    all_raw = [None] * len(images)
-
-    def process_page(args):
-        idx, image = args
-        return call_gpt_single_page(client, image, bank_name, idx)
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-        future_map = {
-            executor.submit(process_page, (idx, img)): idx
-            for idx, img in enumerate(images)
-        }
-        completed = 0
-        for future in concurrent.futures.as_completed(future_map):
-            page_num, result = future.result()
-            all_raw[page_num] = result
-            completed += 1
-            if progress_callback:
-                progress_callback(completed, len(images))
+    """전체 PDF 페이지를 병렬로 GPT 처리 후 Transaction 리스트 반환
+
+    p95 지연시간을 넘겨 미완료인 페이지는 별도 스레드로 중복(헤지) 요청을 보내고,
+    먼저 끝난 쪽 결과를 채택한다. 헤지 요청 수는 HEDGE_BUDGET_RATIO로 제한.
+    """
+    def call_page(idx, on_attempt, cancel):
+        _, result = call_gpt_single_page(
+            client, images[idx], bank_name, idx, on_attempt=on_attempt, cancel=cancel
+        )
+        return result
+
+    all_raw = run_hedged(
+        call_page,
+        num_pages=len(images),
+        tracker=latency_tracker,
+        hedge_budget=max(1, int(len(images) * HEDGE_BUDGET_RATIO)),
+        progress_callback=progress_callback,
+    )
 
     # 모든 페이지 거래 합치기
     transactions = []
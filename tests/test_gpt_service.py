@@ -0,0 +1,247 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import APIConnectionError, APITimeoutError, InternalServerError
+from PIL import Image
+
+from services import gpt_service
+from services.gpt_service import (
+    LatencyTracker,
+    RequestCancelled,
+    call_gpt_single_page,
+    run_hedged,
+)
+
+
+def make_tracker(latency: float) -> LatencyTracker:
+    tracker = LatencyTracker()
+    for _ in range(gpt_service.MIN_LATENCY_SAMPLES):
+        tracker.record(latency)
+    return tracker
+
+
+class PageStub:
+    """페이지별 1차/헤지 요청 동작을 지정하는 call_page 스텁"""
+
+    def __init__(self, behaviors):
+        # behaviors[idx] = [1차 요청 동작, 헤지 요청 동작, ...]
+        self.behaviors = behaviors
+        self.calls = {}
+        self._lock = threading.Lock()
+
+        self.cancelled = []
+
+    def __call__(self, idx, on_attempt, cancel):
+        with self._lock:
+            n = self.calls.get(idx, 0)
+            self.calls[idx] = n + 1
+        on_attempt(time.monotonic())
+        steps = self.behaviors.get(idx, [(0, f"page{idx}")])
+        delay, outcome = steps[min(n, len(steps) - 1)]
+        if cancel.wait(delay):
+            with self._lock:
+                self.cancelled.append(idx)
+            raise RequestCancelled(idx)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_hedge_wins_and_loser_is_ignored():
+    stub = PageStub({0: [(1.0, "primary"), (0, "hedge")]})
+    started = time.monotonic()
+    results = run_hedged(
+        stub, num_pages=2, tracker=make_tracker(0.05), hedge_budget=1, poll_interval=0.01
+    )
+    assert results == ["hedge", "page1"]
+    assert stub.calls[0] == 2
+    assert time.monotonic() - started < 1.0
+
+
+def test_cancelled_loser_frees_worker_for_queued_pages():
+    stub = PageStub({0: [(2.0, "primary"), (0, "hedge")]})
+    started = time.monotonic()
+    results = run_hedged(
+        stub,
+        num_pages=4,
+        tracker=make_tracker(0.05),
+        hedge_budget=1,
+        max_workers=1,
+        poll_interval=0.01,
+    )
+    assert results == ["hedge", "page1", "page2", "page3"]
+    # 진 1차 요청이 중단되어 대기 중이던 페이지가 바로 실행됨
+    assert time.monotonic() - started < 1.0
+    assert stub.cancelled == [0]
+
+
+def test_primary_failure_falls_back_to_hedge():
+    stub = PageStub({0: [(0.2, RuntimeError("boom")), (0.4, "hedge"), (0, "third")]})
+    results = run_hedged(
+        stub, num_pages=1, tracker=make_tracker(0.05), hedge_budget=3, poll_interval=0.01
+    )
+    assert results == ["hedge"]
+    # 1차 요청이 실패해도 같은 페이지를 다시 헤지하지 않음
+    assert stub.calls[0] == 2
+
+
+def test_hedge_budget_is_respected():
+    stub = PageStub({idx: [(0.3, "primary"), (0, "hedge")] for idx in range(3)})
+    results = run_hedged(
+        stub, num_pages=3, tracker=make_tracker(0.05), hedge_budget=1, poll_interval=0.01
+    )
+    assert results.count("hedge") == 1
+    assert sum(stub.calls.values()) == 4
+
+
+def test_no_hedge_without_latency_samples():
+    stub = PageStub({0: [(0.2, "primary"), (0, "hedge")]})
+    results = run_hedged(
+        stub, num_pages=1, tracker=LatencyTracker(), hedge_budget=1, poll_interval=0.01
+    )
+    assert results == ["primary"]
+    assert stub.calls[0] == 1
+
+
+def test_no_hedge_during_rate_limit_backoff():
+    calls = []
+
+    def call_page(idx, on_attempt, cancel):
+        calls.append(idx)
+        on_attempt(None)  # 429 대기
+        time.sleep(0.3)
+        on_attempt(time.monotonic())
+        return "primary"
+
+    results = run_hedged(
+        call_page, num_pages=1, tracker=make_tracker(0.05), hedge_budget=1, poll_interval=0.01
+    )
+    assert results == ["primary"]
+    assert calls == [0]
+
+
+def test_all_attempts_failing_raises():
+    stub = PageStub({0: [(0, RuntimeError("boom"))]})
+    with pytest.raises(RuntimeError):
+        run_hedged(stub, num_pages=1, tracker=LatencyTracker(), hedge_budget=1)
+
+
+def test_failure_cancels_remaining_requests():
+    stub = PageStub({0: [(0.1, RuntimeError("boom"))], 1: [(2.0, "slow")]})
+    with pytest.raises(RuntimeError):
+        run_hedged(stub, num_pages=2, tracker=LatencyTracker(), hedge_budget=1, poll_interval=0.01)
+    time.sleep(0.1)
+    assert stub.cancelled == [1]
+
+
+def chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class StreamStub:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+
+REQUEST = httpx.Request("POST", "https://api.openai.com")
+CONTENT = '[{"date":"2025-01-01","type":"입금","amount":1000,"reason":"x"}]'
+
+
+class ClientStub:
+    """요청마다 outcomes의 예외를 올리거나 청크 목록을 스트리밍하는 OpenAI 클라이언트 스텁"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.timeouts = []
+        self.options = {}
+        self.streams = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **options):
+        self.options = options
+        return self
+
+    def create(self, timeout, stream, **kwargs):
+        assert stream
+        self.timeouts.append(timeout)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        self.streams.append(StreamStub(outcome))
+        return self.streams[-1]
+
+
+def test_deadline_expiry_retries_with_ceiling(monkeypatch):
+    tracker = make_tracker(1.0)
+    monkeypatch.setattr(gpt_service, "latency_tracker", tracker)
+    client = ClientStub([APITimeoutError(request=REQUEST), [chunk(CONTENT)]])
+
+    page_num, transactions = call_gpt_single_page(
+        client, Image.new("RGB", (4, 4)), "기타", 0
+    )
+
+    assert page_num == 0
+    assert len(transactions) == 1
+    assert client.options == {"max_retries": 0}
+    assert client.timeouts == [gpt_service.MIN_TIMEOUT, gpt_service.DEFAULT_TIMEOUT]
+    # 타임아웃된 요청도 지연 표본에 기록
+    assert tracker.percentile(100) >= gpt_service.MIN_TIMEOUT
+
+
+def test_no_ceiling_retry_after_page_resolved(monkeypatch):
+    monkeypatch.setattr(gpt_service, "latency_tracker", make_tracker(1.0))
+    cancel = threading.Event()
+
+    class ResolvedDuringTimeout(ClientStub):
+        def create(self, **kwargs):
+            cancel.set()  # 대기 중 헤지가 페이지를 완료
+            return super().create(**kwargs)
+
+    client = ResolvedDuringTimeout([APITimeoutError(request=REQUEST), [chunk(CONTENT)]])
+    with pytest.raises(RequestCancelled):
+        call_gpt_single_page(client, Image.new("RGB", (4, 4)), "기타", 0, cancel=cancel)
+    assert len(client.timeouts) == 1
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        APIConnectionError(request=REQUEST),
+        InternalServerError(
+            "bad gateway", response=httpx.Response(502, request=REQUEST), body=None
+        ),
+    ],
+)
+def test_transient_errors_are_retried(error):
+    client = ClientStub([error, [chunk(CONTENT)]])
+    _, transactions = call_gpt_single_page(client, Image.new("RGB", (4, 4)), "기타", 0)
+    assert len(transactions) == 1
+    assert len(client.timeouts) == 2
+
+
+def test_cancel_stops_stream_between_chunks():
+    cancel = threading.Event()
+
+    def chunks():
+        yield chunk("[")
+        cancel.set()
+        yield chunk(CONTENT)
+
+    client = ClientStub([chunks()])
+    with pytest.raises(RequestCancelled):
+        call_gpt_single_page(client, Image.new("RGB", (4, 4)), "기타", 0, cancel=cancel)
+    assert client.streams[0].closed
+    assert len(client.timeouts) == 1